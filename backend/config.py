@@ -16,4 +16,39 @@ LOGGING_LEVEL = "INFO"
 
 # Flask 应用配置
 FLASK_HOST = "0.0.0.0"
-FLASK_PORT = 5001
\ No newline at end of file
+FLASK_PORT = 5001
+
+# 生产服务配置（gunicorn -c backend/gunicorn.conf.py backend.main:app）
+SERVER_WORKERS = os.cpu_count() or 2
+SERVER_THREADS = 8
+SERVER_TIMEOUT = 600  # /analyze 中的 AI 调用可能耗时数分钟
+# True：master 中导入应用并预热一次，worker fork 后共享，启动快；但 HUP 不会加载新代码，发布需重启 master 或 USR2 热升级
+# False：每个 worker 自行导入应用并预热，HUP 即可加载新代码
+SERVER_PRELOAD = True
+# 启动预热：接收请求前导入重量级依赖、检查 Cookie 文件、加载本地分类模型
+WARMUP_ENABLED = True
+
+# JIRA 解析配置
+# "thread": 抓取线程内直接解析 HTML；"process": 抓取线程只拉取原始字节，交给进程池解析（解析吞吐随 CPU 核数扩展）
+JIRA_PARSE_MODES = ("thread", "process")
+JIRA_PARSE_MODE = "thread"
+JIRA_FETCH_WORKERS = 8
+# 每个进程池的解析进程数，与 SERVER_WORKERS 相互独立。
+# 默认用满 CPU 核：单个大过滤器的解析可以用上所有核；进程池在首次 process 模式请求时才创建，
+# gunicorn 下每个 worker 各自一个池，最多 SERVER_WORKERS * JIRA_PARSE_WORKERS 个解析进程。
+# 若常有多个大过滤器同时分析，可调小该值（或 SERVER_WORKERS）以避免 CPU 超额订阅。
+JIRA_PARSE_WORKERS = os.cpu_count() or 4
+
+# 近似重复描述复用分类结果（SimHash 汉明距离阈值，越小越严格）
+DESCRIPTION_DEDUP_ENABLED = True
+DESCRIPTION_SIMHASH_DISTANCE = 3
+DESCRIPTION_INDEX_MAX_ENTRIES = 5000
+
+# 本地分类模型（字符 n-gram TF-IDF + 逻辑回归），训练：python -m backend.modules.local_classifier
+LOCAL_CLASSIFIER_ENABLED = True
+LOCAL_CLASSIFIER_MODEL_PATH = os.path.join(BASE_DIR, "classifier_model.npz")
+LOCAL_CLASSIFIER_TRAINING_PATH = os.path.join(BASE_DIR, "training_samples.jsonl")
+# 置信度不低于阈值时直接采用本地结果，跳过 AI 调用
+LOCAL_CLASSIFIER_THRESHOLD = 0.85
+# 为 True 时始终使用本地分类结果，不再调用 AI
+LOCAL_CLASSIFIER_PRIMARY = False
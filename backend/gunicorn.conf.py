@@ -0,0 +1,70 @@
+# 生产服务入口：在项目根目录执行
+#   gunicorn -c backend/gunicorn.conf.py backend.main:app
+# 预先 fork 多个 worker，每个 worker 多线程处理请求，单个慢 /analyze 不再阻塞其他请求
+#
+# 发布新代码：
+#   SERVER_PRELOAD = True 时应用在 master 中加载，HUP 只会从旧代码重新 fork worker，
+#   需重启 master，或发送 USR2 热升级（启动新 master 后再向旧 master 发送 QUIT），冷启动耗时见新 master 日志；
+#   SERVER_PRELOAD = False 时 HUP 即可加载新代码，重启耗时见各 worker 就绪日志。
+import time
+import logging
+
+from backend.config import (
+    FLASK_HOST, FLASK_PORT, SERVER_WORKERS, SERVER_THREADS, SERVER_TIMEOUT, SERVER_PRELOAD, WARMUP_ENABLED
+)
+
+bind = f"{FLASK_HOST}:{FLASK_PORT}"
+workers = SERVER_WORKERS
+threads = SERVER_THREADS
+worker_class = "gthread"
+timeout = SERVER_TIMEOUT
+graceful_timeout = 30
+# 开启时 master 中导入应用并完成预热，worker fork 后直接共享已加载的依赖和模型
+preload_app = SERVER_PRELOAD
+
+_started_at = time.perf_counter()
+_reload_started_at = None
+_reload_pending_workers = 0
+
+
+def when_ready(server):
+    # preload_app 时应用已在 master 中导入，此时 worker 尚未 fork、尚未接收请求
+    if WARMUP_ENABLED and SERVER_PRELOAD:
+        from backend.main import warm_up
+        warm_up()
+    server.log.info(f"master 启动完成，冷启动耗时: {time.perf_counter() - _started_at:.3f}s")
+
+
+def on_reload(server):
+    global _reload_started_at, _reload_pending_workers
+    _reload_started_at = time.perf_counter()
+    _reload_pending_workers = server.cfg.workers
+    if SERVER_PRELOAD:
+        server.log.warning("收到 HUP：preload_app 开启，worker 将以已加载的旧代码重新 fork，发布新代码请重启 master 或使用 USR2")
+    else:
+        server.log.info("收到 HUP，开始以新代码替换 worker")
+
+
+def pre_fork(server, worker):
+    # master 中执行：只有本次重启替换的这一批 worker 记录重启时间，之后因超时/崩溃/max_requests 拉起的 worker 不计入
+    global _reload_started_at, _reload_pending_workers
+    worker.reload_started_at = _reload_started_at
+    if _reload_started_at is not None:
+        _reload_pending_workers -= 1
+        if _reload_pending_workers <= 0:
+            _reload_started_at = None
+
+
+def post_fork(server, worker):
+    worker.forked_at = time.perf_counter()
+
+
+def post_worker_init(worker):
+    # 未开启 preload_app 时应用在 worker 中加载，预热放在接收请求之前逐个 worker 执行
+    if WARMUP_ENABLED and not SERVER_PRELOAD:
+        from backend.main import warm_up
+        warm_up()
+    message = f"worker {worker.pid} 就绪，fork 后耗时: {time.perf_counter() - worker.forked_at:.3f}s"
+    if worker.reload_started_at is not None:
+        message += f"，距重启信号: {time.perf_counter() - worker.reload_started_at:.3f}s"
+    logging.getLogger("gunicorn.error").info(message)
@@ -1,3 +1,6 @@
+import time
+_import_started = time.perf_counter()
+
 import os
 from flask import Flask, request, jsonify, send_from_directory
 import requests
@@ -5,8 +8,8 @@ import logging
 from flask_cors import CORS
 
 # ===== JIRA 相关 import =====
-from backend.config import BASE_DIR
-from backend.modules.jira_parser import parse_and_return_data
+# jira_parser（bs4）和 local_classifier（numpy）较重，在首次用到的路由中或预热时再导入
+from backend.config import BASE_DIR, LOGGING_FORMAT, LOGGING_LEVEL, WARMUP_ENABLED, JIRA_PARSE_MODES
 from backend.modules.cookie import get_atl_token_and_cookies, load_cookies, format_cookies
 from backend.modules.git_compare import compare_commits_by_diff
 
@@ -16,12 +19,54 @@ import tempfile
 import subprocess
 import shutil
 
-logging.basicConfig(level=logging.INFO, format='[%(asctime)s] %(levelname)s: %(message)s')
+logging.basicConfig(level=LOGGING_LEVEL, format=LOGGING_FORMAT)
 COOKIE_FILE_PATH = os.path.join(BASE_DIR, "cookies.json")
 
 app = Flask(__name__)
 CORS(app)
 
+# 启动耗时统计，通过 /api/status 查看
+STARTUP_METRICS = {"import_seconds": round(time.perf_counter() - _import_started, 3)}
+
+
+def warm_up():
+    """
+    接收请求前预热：导入重量级依赖、检查 Cookie 文件是否存在、加载本地分类模型。单步失败不影响服务启动。
+    Cookie 每次请求仍从文件读取（浏览器刷新后会更新文件），这里只提前暴露文件缺失的问题。
+    """
+    started = time.perf_counter()
+    steps = {}
+
+    def run_step(name, func):
+        step_started = time.perf_counter()
+        try:
+            func()
+            steps[name] = round(time.perf_counter() - step_started, 3)
+        except Exception as e:
+            logging.warning(f"预热步骤 {name} 失败: {e}")
+            steps[name] = f"failed: {e}"
+
+    def import_modules():
+        import backend.modules.jira_parser  # noqa: F401
+        import backend.modules.local_classifier  # noqa: F401
+
+    def check_cookie_file():
+        from backend.modules.cookie import COOKIE_FILE_PATH as cookie_file_path
+        if not os.path.isfile(cookie_file_path):
+            raise Exception(f"Cookie 文件不存在: {cookie_file_path}")
+
+    def load_classifier():
+        from backend.modules.local_classifier import get_classifier
+        get_classifier()
+
+    run_step("imports", import_modules)
+    run_step("cookie_file", check_cookie_file)
+    run_step("classifier", load_classifier)
+
+    STARTUP_METRICS["warmup_seconds"] = round(time.perf_counter() - started, 3)
+    STARTUP_METRICS["warmup_steps"] = steps
+    logging.info(f"预热完成，耗时: {STARTUP_METRICS['warmup_seconds']}s，明细: {steps}")
+
 @app.route('/')
 def serve():
     return send_from_directory(app.static_folder, 'index.html')
@@ -38,9 +83,12 @@ def analyze():
     data = request.json
     jira_url = data.get('jira_url')
     cookie_info = data.get('cookies')
+    parse_mode = data.get('parse_mode')
 
     if not jira_url:
         return jsonify({"error": "JIRA URL is required"}), 400
+    if parse_mode is not None and parse_mode not in JIRA_PARSE_MODES:
+        return jsonify({"error": f"parse_mode 必须为 {' / '.join(JIRA_PARSE_MODES)} 之一"}), 400
 
     cookies = {}
     if cookie_info:
@@ -49,7 +97,8 @@ def analyze():
         cookies = load_cookies()
 
     try:
-        result_data = parse_and_return_data(jira_url, cookies)
+        from backend.modules.jira_parser import parse_and_return_data
+        result_data = parse_and_return_data(jira_url, cookies, parse_mode)
         return jsonify({"results": result_data}), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -67,6 +116,8 @@ def assign_issues():
             cookies = format_cookies(cookies)
         else:
             cookies = load_cookies()
+        from backend.modules.jira_parser import MODULE_OWNERS
+        from backend.modules.local_classifier import record_assignment
         headers = {
             "accept": "*/*",
             "accept-language": "zh-CN,zh;q=0.9,en;q=0.8",
@@ -91,6 +142,8 @@ def assign_issues():
 
             if assign_response.status_code == 200:
                 print(f"[SUCCESS] Issue {issue_id} assigned to {assignee}")
+                # 分配成功后，人工确认的结果才作为本地分类模型的训练样本
+                record_assignment(item, assignee, MODULE_OWNERS)
             else:
                 print(f"[ERROR] Failed to assign issue {issue_id}. Response: {assign_response.text}")
 
@@ -152,6 +205,13 @@ def add_label():
         logging.error(f"标签添加异常: {str(e)}")
         return jsonify({"error": f"服务器内部错误: {str(e)}"}), 500
 
+@app.route('/api/status', methods=['GET'])
+def status():
+    """
+    返回当前 worker 进程的启动耗时统计
+    """
+    return jsonify({"pid": os.getpid(), **STARTUP_METRICS}), 200
+
 # ========== Git提交点对比API部分 ==========
 
 @app.route('/api/compare-commits', methods=['POST'])
@@ -165,16 +225,27 @@ def compare_commits():
     target_branch = data.get("target_branch")
     start_commit = data.get("start_commit")
     check_all = data.get("check_all", False)
+    page = data.get("page")
+    limit = data.get("limit")
 
     # 参数校验
     if not (os.path.isdir(repo_path) and os.path.isdir(os.path.join(repo_path, ".git"))):
         return jsonify({"error": f"本地仓库目录不存在: {repo_path}"}), 400
     if not (source_branch and target_branch and start_commit):
         return jsonify({"error": "参数不完整"}), 400
+    if page is not None and limit is None:
+        return jsonify({"error": "分页需同时提供 limit"}), 400
+    try:
+        page = int(page) if page is not None else 1
+        limit = int(limit) if limit is not None else None
+    except (TypeError, ValueError):
+        return jsonify({"error": "page/limit 参数必须为整数"}), 400
+    if page < 1 or (limit is not None and limit < 1):
+        return jsonify({"error": "page/limit 参数必须为正整数"}), 400
 
     try:
-        matched, unmatched, checked_count = compare_commits_by_diff(
-            repo_path, source_branch, target_branch, start_commit, check_all
+        matched, unmatched, checked_count, has_more = compare_commits_by_diff(
+            repo_path, source_branch, target_branch, start_commit, check_all, page, limit
         )
         # 日志打印
         print("== 对比结果 ==")
@@ -188,11 +259,17 @@ def compare_commits():
             "matched_count": len(matched),
             "unmatched_count": len(unmatched),
             "matched": matched,
-            "unmatched": unmatched
+            "unmatched": unmatched,
+            "page": page,
+            "limit": limit,
+            "has_more": has_more
         }), 200
     except Exception as e:
         print("[ERROR]", e)
         return jsonify({"error": str(e)}), 500
 
 if __name__ == '__main__':
+    # 开发模式；生产环境使用 gunicorn -c backend/gunicorn.conf.py backend.main:app
+    if WARMUP_ENABLED:
+        warm_up()
     app.run(host='0.0.0.0', port=5001, debug=True, use_reloader=False)
\ No newline at end of file
@@ -1,4 +1,3 @@
-import pandas as pd
 import requests
 import json
 import time
@@ -8,6 +7,8 @@ def assign_issues_from_excel(excel_file_path, cookie_file_path, delay=2):
     """
     从 Excel 文件读取数据并分配任务。
     """
+    import pandas as pd  # 仅 Excel 导入时需要，延迟导入避免拖慢服务启动
+
     try:
         logging.info(f"读取 Excel 文件: {excel_file_path}")
         df = pd.read_excel(excel_file_path)
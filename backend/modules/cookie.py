@@ -2,8 +2,6 @@ import os
 import json
 import logging
 
-logging.basicConfig(level=logging.INFO, format='[%(asctime)s] %(levelname)s: %(message)s')
-
 COOKIE_FILE_PATH = "/Users/hedongwei/Documents/Work/PycharmProjects/LocalAssistant/backend/cookies.json"
 
 def get_cookies_from_browser():
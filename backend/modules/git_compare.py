@@ -1,9 +1,17 @@
 import subprocess
 import hashlib
-import datetime
+import tempfile
+import threading
+from collections import OrderedDict, deque
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
 MAX_WORKERS = 8  # 可根据机器核心数自行调整
+MAX_PENDING_HASHES = MAX_WORKERS * 4  # 流式比对时同时在途的diff hash任务上限
+MAX_CACHED_HASH_MAPS = 8  # 缓存的目标分支diff hash表数量
+
+# 目标分支diff hash表缓存：(repo_path, branch, 分支tip, max_commits) -> hash_map，分支有新提交时自动失效
+_hash_map_cache = OrderedDict()
+_hash_map_cache_lock = threading.Lock()
 
 def run_git(cmd, repo_path):
     result = subprocess.run(
@@ -13,38 +21,69 @@ def run_git(cmd, repo_path):
         print(f"[ERR] {' '.join(cmd)}: {result.stderr}")
     return result
 
-def parse_git_date(date_str):
-    # e.g. Thu Jul 17 16:18:28 2025 +0800
-    try:
-        dt = datetime.datetime.strptime(date_str[:-6], "%a %b %d %H:%M:%S %Y")
-        # 只保留年月日时分秒
-        return dt.strftime("%Y-%m-%d %H:%M:%S")
-    except Exception as e:
-        print(f"date parse error: {e}, origin: {date_str}")
-        return date_str
-
-def get_commit_list(repo_path, branch, start_commit, check_all):
+# 提交记录字段：hash、作者、作者日期、标题，字段和记录均以 NUL 分隔（-z），不受作者名/标题中的 | 等字符影响
+COMMIT_LOG_FORMAT = '%H%x00%an%x00%ad%x00%s'
+COMMIT_DATE_FORMAT = '--date=format:%Y-%m-%d %H:%M:%S'
+COMMIT_FIELD_COUNT = 4
+READ_CHUNK_SIZE = 64 * 1024
+
+def iter_commits(repo_path, branch, start_commit, check_all, skip=0, limit=None):
+    """
+    流式枚举源分支提交：边读 git log 管道边产出，内存占用与区间大小无关。
+    :param skip: 跳过的提交数（分页偏移）
+    :param limit: 最多返回的提交数，None 表示不限制
+    """
+    cmd = ['git', 'log', '-z', f'--format={COMMIT_LOG_FORMAT}', COMMIT_DATE_FORMAT]
     if check_all:
-        cmd = ['git', 'log', '--pretty=format:%H|%an|%ad|%s', f'{start_commit}^..{branch}']
-        print(f"Running: git log {start_commit}^..{branch}")
+        if skip:
+            cmd.append(f'--skip={skip}')
+        if limit is not None:
+            cmd.append(f'-n{limit}')
+        cmd.append(f'{start_commit}^..{branch}')
+        print(f"Running: git log {start_commit}^..{branch} (skip={skip}, limit={limit})")
     else:
-        cmd = ['git', 'log', '--pretty=format:%H|%an|%ad|%s', '-1', start_commit]
+        if skip:
+            # 单提交模式只有一页
+            return
+        cmd += ['-1', start_commit]
         print(f"Running: git log -1 {start_commit}")
-    res = run_git(cmd, repo_path)
-    print(f"git log output:\n{res.stdout}")
-    commits = []
-    for line in res.stdout.strip().split('\n'):
-        if line:
-            parts = line.split('|', 3)
-            date_fmt = parse_git_date(parts[2])
-            commits.append({
-                "commit": parts[0],
-                "author": parts[1],
-                "date": date_fmt,
-                "message": parts[3] if len(parts) > 3 else ''
-            })
-    print(f"Total commits fetched: {len(commits)}")
-    return commits
+
+    # stderr 写入临时文件：若用管道且只在 stdout 读完后才读取，stderr 写满管道会导致死锁
+    stderr_file = tempfile.TemporaryFile()
+    proc = subprocess.Popen(cmd, cwd=repo_path, stdout=subprocess.PIPE, stderr=stderr_file)
+    count = 0
+    try:
+        buf = b''
+        fields = []
+        while True:
+            chunk = proc.stdout.read(READ_CHUNK_SIZE)
+            if not chunk:
+                break
+            buf += chunk
+            *tokens, buf = buf.split(b'\0')
+            for token in tokens:
+                fields.append(token.decode('utf-8', errors='replace'))
+                if len(fields) == COMMIT_FIELD_COUNT:
+                    count += 1
+                    yield {
+                        "commit": fields[0],
+                        "author": fields[1],
+                        "date": fields[2],
+                        "message": fields[3]
+                    }
+                    fields = []
+        proc.wait()
+        if proc.returncode != 0:
+            stderr_file.seek(0)
+            print(f"[ERR] {' '.join(cmd)}: {stderr_file.read().decode('utf-8', errors='ignore')}")
+    finally:
+        # 调用方提前停止迭代时结束 git 进程
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+        proc.stdout.close()
+        stderr_file.close()
+        print(f"Total commits fetched: {count}")
 
 def get_commit_diff_hash(repo_path, commit_id):
     """
@@ -92,37 +131,51 @@ def build_branch_diffhash_map(repo_path, branch, max_commits=1000):
     print(f"目标分支diff hash表构建完成: {len(hash_map)} 条")
     return hash_map
 
-def get_src_commit_diff_hashes(repo_path, src_commits):
+def get_branch_diffhash_map(repo_path, branch, max_commits=1000):
     """
-    源分支的提交也批量算diff hash，返回 {commit_id: diff_hash}
+    带缓存的目标分支diff hash表：按分支tip缓存，分页比对同一区间时只构建一次。
     """
-    def compute_hash(commit):
-        diff_hash = get_commit_diff_hash(repo_path, commit["commit"])
-        return (commit["commit"], diff_hash)
+    res = run_git(['git', 'rev-parse', branch], repo_path)
+    tip = res.stdout.strip()
+    if res.returncode != 0 or not tip:
+        return build_branch_diffhash_map(repo_path, branch, max_commits)
 
-    result = {}
-    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-        future_to_commit = {executor.submit(compute_hash, commit): commit for commit in src_commits}
-        for future in as_completed(future_to_commit):
-            commit_id, diff_hash = future.result()
-            result[commit_id] = diff_hash
-    return result
+    key = (repo_path, branch, tip, max_commits)
+    with _hash_map_cache_lock:
+        hash_map = _hash_map_cache.get(key)
+        if hash_map is not None:
+            _hash_map_cache.move_to_end(key)
+            print(f"目标分支 {branch} diff hash表命中缓存 ({tip[:10]})")
+            return hash_map
 
-def compare_commits_by_diff(repo_path, source_branch, target_branch, start_commit, check_all):
-    # 1. 源分支提交列表
-    src_commits = get_commit_list(repo_path, source_branch, start_commit, check_all)
-    print(f"源分支{source_branch}待比对提交数: {len(src_commits)}")
-    if not src_commits:
-        return [], [], 0
+    hash_map = build_branch_diffhash_map(repo_path, branch, max_commits)
+    with _hash_map_cache_lock:
+        _hash_map_cache[key] = hash_map
+        while len(_hash_map_cache) > MAX_CACHED_HASH_MAPS:
+            _hash_map_cache.popitem(last=False)
+    return hash_map
 
-    # 2. 目标分支diff hash表
-    tgt_diff_hash_map = build_branch_diffhash_map(repo_path, target_branch)
-    # 3. 源分支所有提交也批量生成diff hash
-    src_commit_hash_map = get_src_commit_diff_hashes(repo_path, src_commits)
+def compare_commits_by_diff(repo_path, source_branch, target_branch, start_commit, check_all, page=1, limit=None):
+    """
+    流式比对：源分支提交边枚举边计算diff hash，在途任务数有上限，结果保持源分支提交顺序。
+    :param page: 页码（从1开始），仅在 limit 有值时生效
+    :param limit: 每页提交数，None 表示比对整个区间
+    :return: (matched, unmatched, checked_count, has_more)
+    """
+    # 1. 目标分支diff hash表
+    tgt_diff_hash_map = get_branch_diffhash_map(repo_path, target_branch)
+
+    # 2. 源分支提交流式生成diff hash；多取一条用于判断是否还有下一页
+    skip = (page - 1) * limit if limit else 0
+    fetch_limit = limit + 1 if limit else None
+    src_commits = iter_commits(repo_path, source_branch, start_commit, check_all, skip, fetch_limit)
 
     matched, unmatched = [], []
-    for commit in src_commits:
-        diff_hash = src_commit_hash_map.get(commit["commit"])
+    checked_count = 0
+    has_more = False
+
+    def collect(commit, future):
+        diff_hash = future.result()
         tgt_commit = tgt_diff_hash_map.get(diff_hash)
         if diff_hash and tgt_commit:
             # 匹配到了目标分支，返回目标分支的commit id
@@ -131,5 +184,20 @@ def compare_commits_by_diff(repo_path, source_branch, target_branch, start_commi
         else:
             unmatched.append(commit)
 
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        for commit in src_commits:
+            if limit and checked_count == limit:
+                has_more = True
+                break
+            checked_count += 1
+            pending.append((commit, executor.submit(get_commit_diff_hash, repo_path, commit["commit"])))
+            if len(pending) >= MAX_PENDING_HASHES:
+                collect(*pending.popleft())
+        src_commits.close()
+        while pending:
+            collect(*pending.popleft())
+
+    print(f"源分支{source_branch}已比对提交数: {checked_count}")
     print(f"对比完成。目标分支已包含: {len(matched)}，未包含: {len(unmatched)}")
-    return matched, unmatched, len(src_commits)
\ No newline at end of file
+    return matched, unmatched, checked_count, has_more
@@ -1,16 +1,20 @@
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
+import threading
 
 from bs4 import BeautifulSoup
 import logging
 import requests
 
-from backend.config import BASE_JIRA_URL
+from backend.config import BASE_JIRA_URL, JIRA_PARSE_MODES, JIRA_PARSE_MODE, JIRA_FETCH_WORKERS, JIRA_PARSE_WORKERS
+from backend.config import DESCRIPTION_DEDUP_ENABLED, DESCRIPTION_SIMHASH_DISTANCE, DESCRIPTION_INDEX_MAX_ENTRIES
+from backend.config import LOCAL_CLASSIFIER_THRESHOLD, LOCAL_CLASSIFIER_PRIMARY
 from backend.modules.ai_deepseek import get_module_from_deepseek
+from backend.modules.local_classifier import predict_local, record_outcome
+from backend.modules.similarity import SimHashIndex
 from backend.modules.cookie import format_cookies, load_cookies, handle_cookie_expiry
 
-# 记录日志配置
-logging.basicConfig(level=logging.INFO, format='[%(asctime)s] %(levelname)s: %(message)s')
-
 MODULE_OWNERS = {
     "员工信息管理": "menglw",
     "混合云同步": "menglw",
@@ -30,11 +34,12 @@ MODULE_OWNERS = {
 }
 
 
-def fetch_with_browser_cookie(url, cookies=None, session=None):
+def fetch_with_browser_cookie(url, cookies=None, session=None, raw=False):
     """
     使用提供的 Cookie 或默认浏览器 Cookie 访问目标 URL。
     :param url: 目标网址
     :param cookies: 已加载的 Cookie 字典（如果提供）
+    :param raw: 为 True 时返回原始字节（不做解码），便于直接交给进程池解析
     :return: 返回请求成功的网页 HTML 内容
     """
     headers = {}
@@ -65,7 +70,7 @@ def fetch_with_browser_cookie(url, cookies=None, session=None):
             response = requests.get(url, headers=headers, verify=False)
 
         if response.status_code == 200:
-            return response.text
+            return response.content if raw else response.text
         else:
             raise Exception(f"Failed to fetch URL: {url}, HTTP Status: {response.status_code}")
     except Exception as e:
@@ -73,9 +78,130 @@ def fetch_with_browser_cookie(url, cookies=None, session=None):
         raise
 
 
-def assign_assignee(description):
-    """ 返回包含分析结果的完整对象 """
+# 进程池延迟创建，整个服务生命周期内复用
+_parse_pool = None
+_parse_pool_lock = threading.Lock()
+
+
+def get_parse_pool():
+    """
+    获取（必要时创建）用于 HTML 解析的进程池。
+    当前进程是多线程的（gthread worker / 抓取线程池），直接 fork 可能死锁，子进程改用 forkserver（不支持时用 spawn）启动。
+    """
+    global _parse_pool
+    with _parse_pool_lock:
+        if _parse_pool is None:
+            start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            logging.info(f"创建 HTML 解析进程池，进程数: {JIRA_PARSE_WORKERS}，启动方式: {start_method}")
+            _parse_pool = ProcessPoolExecutor(
+                max_workers=JIRA_PARSE_WORKERS,
+                mp_context=multiprocessing.get_context(start_method)
+            )
+        return _parse_pool
+
+
+def reset_parse_pool(broken_pool):
+    """
+    子进程异常退出（如解析超大页面时 OOM）后进程池不可再用，丢弃后下次使用时重建。
+    """
+    global _parse_pool
+    with _parse_pool_lock:
+        if _parse_pool is broken_pool:
+            _parse_pool = None
+    broken_pool.shutdown(wait=False)
+
+
+def parse_in_pool(issue_bytes):
+    """
+    在进程池中解析 issue 页面；进程池损坏时重建并重试一次。
+    """
+    pool = get_parse_pool()
+    try:
+        return pool.submit(extract_issue_fields, issue_bytes).result()
+    except BrokenProcessPool:
+        logging.warning("HTML 解析进程池已损坏，重建后重试")
+        reset_parse_pool(pool)
+        return get_parse_pool().submit(extract_issue_fields, issue_bytes).result()
+
+
+def extract_issue_fields(issue_html):
+    """
+    从 issue 页面中提取描述和 ID (customfield_12208-val)。
+    需保持为模块级函数，以便在进程池中执行；只返回体积很小的提取结果。
+    :param issue_html: issue 页面 HTML（str 或原始 bytes）
+    :return: (description, issue_id)
+    """
+    issue_soup = BeautifulSoup(issue_html, "html.parser")
+
+    description_element = issue_soup.find(class_="je_rdata je_pr_required")
+    description = description_element.text.strip() if description_element else "No description found"
+
+    customfield_element = issue_soup.find(id="customfield_12208-val")
+    issue_id = customfield_element.text.strip() if customfield_element else "No ID found"
+
+    return description, issue_id
+
+
+# 已分类描述的相似度索引，近似重复的工单复用模块/负责人，减少重复的 AI 调用
+_description_index = SimHashIndex(
+    max_distance=DESCRIPTION_SIMHASH_DISTANCE,
+    max_entries=DESCRIPTION_INDEX_MAX_ENTRIES
+)
+
+
+def assign_assignee(description, local_prediction=None):
+    """
+    返回包含分析结果的完整对象。
+    本地模型置信度达到阈值时直接采用本地结果；与已分类描述近似重复时复用其结果（inherited 为 True）。
+    :param local_prediction: 本地模型的 (module, probability)，未提供时单独预测
+    """
+    if local_prediction is None:
+        local_prediction = predict_local([description])[0]
+    if local_prediction:
+        module, probability = local_prediction
+        if LOCAL_CLASSIFIER_PRIMARY or probability >= LOCAL_CLASSIFIER_THRESHOLD:
+            return local_assign_result(module, probability)
+
+    if not DESCRIPTION_DEDUP_ENABLED:
+        return classify_assignee(description, local_prediction)
+
+    fingerprint, future, is_owner = _description_index.lookup_or_reserve(description)
+    if not is_owner:
+        inherited = future.result()
+        if inherited:
+            return {**inherited, "inherited": True}
+        # 近似描述分类失败，自行调用 AI
+        return classify_assignee(description, local_prediction)
+
+    result = None
+    try:
+        result = classify_assignee(description, local_prediction)
+        return result
+    finally:
+        # 只复用 AI 分类成功的结果，失败（ai_failed）或本地结果移除记录，等待中及后续的近似描述自行分类
+        succeeded = result and result["source"] == "ai"
+        _description_index.resolve(fingerprint, future, result if succeeded else None)
+
+
+def local_assign_result(module, probability):
+    """ 根据本地模型预测结果匹配负责人 """
+    return {
+        "assignee": MODULE_OWNERS.get(module, "hedwf"),
+        "module": module,
+        "reasoning": f"本地分类模型预测，置信度: {probability:.2f}",
+        "inherited": False,
+        "source": "local"
+    }
+
+
+def classify_assignee(description, local_prediction=None):
+    """ 调用 AI 分类并匹配负责人；AI 调用失败时退回本地模型结果 """
     ai_result = get_module_from_deepseek(description)
+    ai_failed = ai_result['reasoning'] == "AI分析失败"
+    if ai_failed and local_prediction:
+        return local_assign_result(*local_prediction)
+    # AI 调用失败时的默认结果单独标记，不参与近似复用
+    source = "ai_failed" if ai_failed else "ai"
 
     # 匹配负责人逻辑
     for module_name in MODULE_OWNERS:
@@ -83,14 +209,18 @@ def assign_assignee(description):
             return {
                 "assignee": MODULE_OWNERS[module_name],
                 "module": ai_result['module'],
-                "reasoning": ai_result['reasoning']
+                "reasoning": ai_result['reasoning'],
+                "inherited": False,
+                "source": source
             }
 
     # 默认情况
     return {
         "assignee": "hedwf",
         "module": ai_result['module'],
-        "reasoning": ai_result['reasoning']
+        "reasoning": ai_result['reasoning'],
+        "inherited": False,
+        "source": source
     }
 
 
@@ -115,15 +245,20 @@ def original_assign_logic(description):
     else:
         return 'hedwf'
 
-def parse_and_return_data(issue_url,cookies=None):
+def parse_and_return_data(issue_url, cookies=None, parse_mode=None):
     """
     提取 issue-link-key 列表，拼接 URL 并抓取描述、ID (customfield_12208-val) 和分配 Assignee。
     :param issue_url: 包含 issue-list 的页面 URL
     :param cookies: 可选，提供的 cookie 字典
+    :param parse_mode: "thread" 或 "process"，默认取 JIRA_PARSE_MODE
     :return: 解析后的数据列表
     """
     try:
-        logging.info(f"开始解析 URL: {issue_url}")
+        parse_mode = parse_mode or JIRA_PARSE_MODE
+        if parse_mode not in JIRA_PARSE_MODES:
+            raise ValueError(f"不支持的解析模式: {parse_mode}")
+        logging.info(f"开始解析 URL: {issue_url}，解析模式: {parse_mode}")
+        use_process_pool = parse_mode == "process"
 
         # 获取 issue-list 页面内容
         html_content = fetch_with_browser_cookie(issue_url, cookies)
@@ -149,41 +284,60 @@ def parse_and_return_data(issue_url,cookies=None):
         session = requests.Session()
         session.verify = False
 
-        # 封装单任务处理函数
-        def process_issue(key):
+        # 封装单任务抓取函数
+        def fetch_issue(key):
             try:
                 issue_page_url = f"{BASE_JIRA_URL}/{key}"
                 logging.info(f"Fetching details for: {issue_page_url}")
 
                 # 使用共享Session发起请求
-                issue_html = fetch_with_browser_cookie(issue_page_url, cookies, session=session)
-                issue_soup = BeautifulSoup(issue_html, "html.parser")
-
-                # 提取描述和ID（保持原有逻辑）
-                description_element = issue_soup.find(class_="je_rdata je_pr_required")
-                description = description_element.text.strip() if description_element else "No description found"
-
-                customfield_element = issue_soup.find(id="customfield_12208-val")
-                issue_id = customfield_element.text.strip() if customfield_element else "No ID found"
-
-                # 异步分配负责人（可并行处理）
-                assign_result = assign_assignee(description)
+                if use_process_pool:
+                    # 进程模式：线程只负责 I/O，原始字节交给进程池解析，绕开 GIL
+                    issue_bytes = fetch_with_browser_cookie(issue_page_url, cookies, session=session, raw=True)
+                    description, issue_id = parse_in_pool(issue_bytes)
+                else:
+                    issue_html = fetch_with_browser_cookie(issue_page_url, cookies, session=session)
+                    description, issue_id = extract_issue_fields(issue_html)
 
                 return {
                     "url": issue_page_url,
                     "description": description,
-                    "id": issue_id,
-                    "assignee": assign_result["assignee"],
-                    "module": assign_result["module"],
-                    "reasoning": assign_result["reasoning"]
+                    "id": issue_id
                 }
             except Exception as e:
                 logging.error(f"处理问题 {key} 失败: {e}")
                 return None
 
-        # 使用线程池并发处理（建议并发数5-10）
-        with ThreadPoolExecutor(max_workers=8) as executor:
-            futures = {executor.submit(process_issue, key): key for key in issue_keys}
+        # 使用线程池并发抓取（建议并发数5-10）
+        # 进程模式下抓取线程数不少于解析进程数，保证每个核都有待解析的页面
+        issues = []
+        fetch_workers = max(JIRA_FETCH_WORKERS, JIRA_PARSE_WORKERS) if use_process_pool else JIRA_FETCH_WORKERS
+        with ThreadPoolExecutor(max_workers=fetch_workers) as executor:
+            futures = {executor.submit(fetch_issue, key): key for key in issue_keys}
+
+            for future in as_completed(futures):
+                issue = future.result()
+                if issue:
+                    issues.append(issue)
+
+        # 本地模型一次性批量打分
+        local_predictions = predict_local([issue["description"] for issue in issues])
+
+        def process_issue(issue, local_prediction):
+            try:
+                assign_result = assign_assignee(issue["description"], local_prediction)
+                # 只记录 AI 实际分类成功的结果；ai_failed 的默认“其他”不能作为训练样本
+                if assign_result["source"] == "ai" and not assign_result["inherited"]:
+                    record_outcome(issue["description"], assign_result["module"], assign_result["assignee"], "analyze")
+                return {**issue, **assign_result}
+            except Exception as e:
+                logging.error(f"分配问题 {issue['url']} 失败: {e}")
+                return None
+
+        # 并发分配负责人（AI 调用为 I/O 等待）
+        with ThreadPoolExecutor(max_workers=JIRA_FETCH_WORKERS) as executor:
+            futures = [executor.submit(process_issue, issue, prediction)
+                       for issue, prediction in zip(issues, local_predictions)]
 
             for future in as_completed(futures):
                 result = future.result()
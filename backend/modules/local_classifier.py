@@ -0,0 +1,318 @@
+import os
+import json
+import math
+import time
+import logging
+import random
+import threading
+from collections import Counter
+
+try:
+    import fcntl
+except ImportError:  # Windows 无 fcntl，退化为依赖 O_APPEND 单次写入
+    fcntl = None
+
+import numpy as np
+
+from backend.config import LOCAL_CLASSIFIER_ENABLED, LOCAL_CLASSIFIER_MODEL_PATH, LOCAL_CLASSIFIER_TRAINING_PATH
+from backend.config import LOCAL_CLASSIFIER_THRESHOLD
+from backend.modules.similarity import normalize_text
+
+NGRAM_RANGE = (1, 3)
+MAX_FEATURES = 5000
+MIN_DF = 2
+VALIDATION_RATIO = 0.2
+REPORT_THRESHOLDS = (0.5, 0.7, 0.85, 0.9, 0.95)
+
+
+def char_ngrams(text):
+    """
+    归一化后按字符切分 n-gram，中文描述无需分词。
+    """
+    text = normalize_text(text)
+    grams = []
+    for n in range(NGRAM_RANGE[0], NGRAM_RANGE[1] + 1):
+        grams.extend(text[i:i + n] for i in range(len(text) - n + 1))
+    return grams
+
+
+class LocalClassifier:
+    """
+    字符 n-gram TF-IDF + 多分类逻辑回归（softmax），纯 numpy 实现，只依赖 CPU。
+    """
+
+    def __init__(self):
+        self.vocabulary = {}
+        self.idf = None
+        self.weights = None
+        self.bias = None
+        self.classes = []
+        self.epochs = 0
+        self.loss = None
+
+    def _vectorize(self, texts):
+        """
+        批量向量化：sublinear TF * IDF，按行 L2 归一化。
+        """
+        matrix = np.zeros((len(texts), len(self.vocabulary)), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for gram, count in Counter(char_ngrams(text)).items():
+                col = self.vocabulary.get(gram)
+                if col is not None:
+                    matrix[row, col] = 1 + math.log(count)
+        matrix *= self.idf
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1
+        return matrix / norms
+
+    def fit(self, texts, labels, max_epochs=1000, learning_rate=0.05, l2=1e-5, tol=1e-5):
+        doc_freq = Counter()
+        for text in texts:
+            doc_freq.update(set(char_ngrams(text)))
+        grams = [g for g, df in doc_freq.most_common(MAX_FEATURES) if df >= MIN_DF]
+        self.vocabulary = {g: i for i, g in enumerate(grams)}
+        n_docs = len(texts)
+        self.idf = np.array(
+            [math.log((1 + n_docs) / (1 + doc_freq[g])) + 1 for g in grams], dtype=np.float32
+        )
+
+        self.classes = sorted(set(labels))
+        class_index = {c: i for i, c in enumerate(self.classes)}
+        x = self._vectorize(texts)
+        y = np.zeros((n_docs, len(self.classes)), dtype=np.float32)
+        y[np.arange(n_docs), [class_index[l] for l in labels]] = 1
+
+        # Adam 全批量优化，训练损失收敛后提前停止
+        self.weights = np.zeros((x.shape[1], len(self.classes)), dtype=np.float32)
+        self.bias = np.zeros(len(self.classes), dtype=np.float32)
+        params = [self.weights, self.bias]
+        moments = [np.zeros_like(p) for p in params]
+        velocities = [np.zeros_like(p) for p in params]
+        previous_loss = None
+        for epoch in range(1, max_epochs + 1):
+            probs = self._softmax(x @ self.weights + self.bias)
+            loss = -np.mean(np.log(probs[y > 0] + 1e-12)) + 0.5 * l2 * float(np.sum(self.weights ** 2))
+            if previous_loss is not None and previous_loss - loss < tol:
+                break
+            previous_loss = loss
+            grad = (probs - y) / n_docs
+            grads = [x.T @ grad + l2 * self.weights, grad.sum(axis=0)]
+            for p, g, m, v in zip(params, grads, moments, velocities):
+                m *= 0.9
+                m += 0.1 * g
+                v *= 0.999
+                v += 0.001 * g * g
+                m_hat = m / (1 - 0.9 ** epoch)
+                v_hat = v / (1 - 0.999 ** epoch)
+                p -= learning_rate * m_hat / (np.sqrt(v_hat) + 1e-8)
+        self.epochs = epoch
+        self.loss = previous_loss
+        return self
+
+    @staticmethod
+    def _softmax(scores):
+        scores = scores - scores.max(axis=1, keepdims=True)
+        exp = np.exp(scores)
+        return exp / exp.sum(axis=1, keepdims=True)
+
+    def predict_batch(self, texts):
+        """
+        批量预测，一次调用完成整个过滤器的打分。
+        :return: [(module, probability), ...]
+        """
+        if not texts:
+            return []
+        probs = self._softmax(self._vectorize(texts) @ self.weights + self.bias)
+        best = probs.argmax(axis=1)
+        return [(self.classes[i], float(probs[row, i])) for row, i in enumerate(best)]
+
+    def predict(self, text):
+        return self.predict_batch([text])[0]
+
+    def save(self, path):
+        grams = [None] * len(self.vocabulary)
+        for gram, i in self.vocabulary.items():
+            grams[i] = gram
+        np.savez_compressed(
+            path,
+            grams=np.array(grams, dtype=str),
+            idf=self.idf,
+            weights=self.weights,
+            bias=self.bias,
+            classes=np.array(self.classes, dtype=str)
+        )
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        model = cls()
+        model.vocabulary = {g: i for i, g in enumerate(data["grams"].tolist())}
+        model.idf = data["idf"]
+        model.weights = data["weights"]
+        model.bias = data["bias"]
+        model.classes = data["classes"].tolist()
+        return model
+
+
+def record_outcome(description, module, assignee, source):
+    """
+    追加一条分类结果作为训练样本（JSON Lines）。
+    :param source: "analyze"（AI 分类成功的结果）或 "assign"（人工确认后的分配结果）
+    """
+    if not description or not module or description == "No description found":
+        return
+    record = {"description": description, "module": module, "assignee": assignee, "source": source}
+    line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+    try:
+        # 多个 gunicorn worker 进程追加同一文件：O_APPEND 单次写入整行，并用 flock 互斥，避免行间交错
+        fd = os.open(LOCAL_CLASSIFIER_TRAINING_PATH, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            if fcntl:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            os.write(fd, line)
+        finally:
+            os.close(fd)  # 关闭时释放 flock
+    except Exception as e:
+        logging.error(f"记录训练样本失败: {e}")
+
+
+def record_assignment(item, assignee, module_owners):
+    """
+    /assign 分配成功后记录训练样本。前端会提交整张表，只有两类行作为人工确认样本：
+    AI 分类成功且非复用的行，以及负责人被人工修改过的行。
+    本地模型预测（local）、AI 失败默认值（ai_failed）和复用结果（inherited）未经修改时不记录，避免模型自我强化。
+    """
+    module = item.get("module") or ""
+    predicted = next((module_owners[m] for m in module_owners if m in module), "hedwf")
+    from_ai = item.get("source") == "ai" and not item.get("inherited")
+    if from_ai or assignee != predicted:
+        record_outcome(item.get("description"), module, assignee, "assign")
+
+
+def load_training_samples(path, module_owners):
+    """
+    读取历史分类结果，按描述去重（后出现的覆盖先出现的，人工分配结果优先于 AI 结果）。
+    负责人被人工修改过时，若该负责人只负责一个模块则以该模块作为标签，负责多个模块时无法确定模块，丢弃该样本。
+    """
+    owner_modules = {}
+    for module_name, owner in module_owners.items():
+        owner_modules.setdefault(owner, []).append(module_name)
+
+    samples = {}
+    with open(path, "r", encoding="utf-8") as file:
+        for line in file:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            label = next((m for m in module_owners if m in record["module"]), None)
+            if label is None or module_owners[label] != record.get("assignee"):
+                candidates = owner_modules.get(record.get("assignee"), [])
+                label = candidates[0] if len(candidates) == 1 else None
+            if label is None:
+                continue
+            previous = samples.get(record["description"])
+            if previous and previous[1] == "assign" and record["source"] != "assign":
+                continue
+            samples[record["description"]] = (label, record["source"])
+
+    texts = list(samples)
+    labels = [samples[t][0] for t in texts]
+    return texts, labels
+
+
+# 服务启动时（预热）加载一次，之后只读共享
+_classifier = None
+_classifier_loaded = False
+_classifier_lock = threading.Lock()
+
+
+def load_classifier(path=LOCAL_CLASSIFIER_MODEL_PATH):
+    global _classifier
+    if not os.path.exists(path):
+        logging.info(f"本地分类模型不存在，跳过加载: {path}")
+        return None
+    start = time.perf_counter()
+    _classifier = LocalClassifier.load(path)
+    logging.info(f"本地分类模型加载完成，类别数: {len(_classifier.classes)}，耗时: {time.perf_counter() - start:.3f}s")
+    return _classifier
+
+
+def get_classifier():
+    """
+    获取本地分类模型；未预热时在首次使用时加载一次。
+    """
+    global _classifier_loaded
+    if not _classifier_loaded:
+        with _classifier_lock:
+            if not _classifier_loaded:
+                try:
+                    load_classifier()
+                except Exception as e:
+                    logging.error(f"本地分类模型加载失败: {e}")
+                _classifier_loaded = True
+    return _classifier
+
+
+def predict_local(descriptions):
+    """
+    批量预测模块；本地模型未启用或未加载时返回全 None。
+    :return: [(module, probability) 或 None, ...]
+    """
+    classifier = get_classifier() if LOCAL_CLASSIFIER_ENABLED else None
+    if classifier is None:
+        return [None] * len(descriptions)
+    return classifier.predict_batch(descriptions)
+
+
+def evaluate_classifier(model, texts, labels):
+    """
+    验证集评估：整体准确率，以及各阈值下的覆盖率（置信度达到阈值的比例）和覆盖部分的准确率。
+    :return: 评估结果文本行列表
+    """
+    predictions = model.predict_batch(texts)
+    correct = [module == label for (module, _), label in zip(predictions, labels)]
+    lines = [f"验证集样本数: {len(texts)}，准确率: {sum(correct) / len(texts):.3f}"]
+    for threshold in sorted(set(REPORT_THRESHOLDS) | {LOCAL_CLASSIFIER_THRESHOLD}):
+        covered = [ok for (_, probability), ok in zip(predictions, correct) if probability >= threshold]
+        coverage = len(covered) / len(texts)
+        precision = sum(covered) / len(covered) if covered else 0.0
+        marker = "（当前配置）" if threshold == LOCAL_CLASSIFIER_THRESHOLD else ""
+        lines.append(f"阈值 {threshold:.2f}{marker}: 覆盖率 {coverage:.3f}，覆盖部分准确率 {precision:.3f}")
+    return lines
+
+
+def train_classifier(module_owners, training_path=LOCAL_CLASSIFIER_TRAINING_PATH,
+                     model_path=LOCAL_CLASSIFIER_MODEL_PATH):
+    """
+    离线训练：读取历史结果训练模型并保存到磁盘。
+    """
+    texts, labels = load_training_samples(training_path, module_owners)
+    if len(set(labels)) < 2:
+        raise Exception(f"训练样本不足，至少需要两个模块的样本，当前样本数: {len(texts)}")
+    logging.info(f"开始训练本地分类模型，样本数: {len(texts)}，模块数: {len(set(labels))}")
+    start = time.perf_counter()
+
+    # 留出验证集评估准确率和各置信度阈值下的覆盖率，用于选择 LOCAL_CLASSIFIER_THRESHOLD
+    indices = list(range(len(texts)))
+    random.Random(0).shuffle(indices)
+    n_validation = int(len(indices) * VALIDATION_RATIO)
+    if n_validation:
+        validation, train = indices[:n_validation], indices[n_validation:]
+        model = LocalClassifier().fit([texts[i] for i in train], [labels[i] for i in train])
+        for line in evaluate_classifier(model, [texts[i] for i in validation], [labels[i] for i in validation]):
+            logging.info(line)
+    else:
+        logging.warning("样本过少，跳过验证集评估")
+
+    model = LocalClassifier().fit(texts, labels)
+    model.save(model_path)
+    logging.info(f"训练完成，迭代 {model.epochs} 轮，耗时: {time.perf_counter() - start:.1f}s，模型已保存到 {model_path}")
+    return model
+
+
+if __name__ == "__main__":
+    # python -m backend.modules.local_classifier
+    from backend.modules.jira_parser import MODULE_OWNERS
+
+    logging.basicConfig(level=logging.INFO, format='[%(asctime)s] %(levelname)s: %(message)s')
+    train_classifier(MODULE_OWNERS)
@@ -0,0 +1,127 @@
+import re
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+SIMHASH_BITS = 64
+NGRAM_SIZE = 3
+MIN_TEXT_LENGTH = 10  # 归一化后过短的描述指纹不可靠，不参与相似匹配
+
+# 去掉空白、标点以及数字（租户号、日期、单号等通常是同模板工单之间的差异）
+_NORMALIZE_PATTERN = re.compile(r"[\s\d\W_]+", re.UNICODE)
+
+
+def normalize_text(text):
+    """
+    归一化问题描述：转小写，去掉空白、标点和数字。
+    """
+    return _NORMALIZE_PATTERN.sub("", text.lower())
+
+
+def simhash(text):
+    """
+    基于字符 n-gram 计算 64 位 SimHash 指纹（适用于中文等无空格分词的文本）。
+    """
+    if len(text) <= NGRAM_SIZE:
+        grams = [text]
+    else:
+        grams = [text[i:i + NGRAM_SIZE] for i in range(len(text) - NGRAM_SIZE + 1)]
+
+    weights = [0] * SIMHASH_BITS
+    for gram in grams:
+        h = int.from_bytes(hashlib.md5(gram.encode("utf-8")).digest()[:8], "big")
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += 1 if h >> bit & 1 else -1
+
+    fingerprint = 0
+    for bit in range(SIMHASH_BITS):
+        if weights[bit] > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def hamming_distance(a, b):
+    return bin(a ^ b).count("1")
+
+
+class SimHashIndex:
+    """
+    描述相似度索引：SimHash 指纹按位分段建桶，汉明距离不超过 max_distance 的描述视为近似重复。
+    分段数为 max_distance + 1，由抽屉原理保证近似重复至少落在同一个桶中。
+    每条记录保存一个 Future，正在分类中的描述也能被近似重复的工单等待复用。
+    """
+
+    def __init__(self, max_distance=3, max_entries=5000):
+        self.max_distance = max_distance
+        self.max_entries = max_entries
+        self.bands = max_distance + 1
+        self.band_width = SIMHASH_BITS // self.bands
+        self._entries = OrderedDict()  # fingerprint -> Future
+        self._buckets = {}  # (band, value) -> set(fingerprint)
+        self._lock = threading.Lock()
+
+    def _band_keys(self, fingerprint):
+        mask = (1 << self.band_width) - 1
+        return [(band, fingerprint >> (band * self.band_width) & mask) for band in range(self.bands)]
+
+    def _find(self, fingerprint):
+        best, best_distance = None, None
+        for key in self._band_keys(fingerprint):
+            for candidate in self._buckets.get(key, ()):
+                distance = hamming_distance(fingerprint, candidate)
+                if distance <= self.max_distance and (best_distance is None or distance < best_distance):
+                    best, best_distance = candidate, distance
+        return best, best_distance
+
+    def _add(self, fingerprint, future):
+        self._entries[fingerprint] = future
+        for key in self._band_keys(fingerprint):
+            self._buckets.setdefault(key, set()).add(fingerprint)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, fingerprint):
+        self._entries.pop(fingerprint, None)
+        for key in self._band_keys(fingerprint):
+            bucket = self._buckets.get(key)
+            if bucket:
+                bucket.discard(fingerprint)
+                if not bucket:
+                    del self._buckets[key]
+
+    def lookup_or_reserve(self, description):
+        """
+        查找近似重复的描述。
+        :return: (fingerprint, future, is_owner)
+                 is_owner 为 True 表示未命中，调用方需完成分类后调用 resolve；
+                 否则 future 为已分类（或分类中）的近似描述的结果。
+                 描述过短时返回 (None, None, True)，不参与索引。
+        """
+        text = normalize_text(description)
+        if len(text) < MIN_TEXT_LENGTH:
+            return None, None, True
+
+        fingerprint = simhash(text)
+        with self._lock:
+            match, distance = self._find(fingerprint)
+            if match is not None:
+                self._entries.move_to_end(match)
+                logging.info(f"命中近似描述，汉明距离: {distance}")
+                return match, self._entries[match], False
+            future = Future()
+            self._add(fingerprint, future)
+            return fingerprint, future, True
+
+    def resolve(self, fingerprint, future, result):
+        """
+        写入分类结果；result 为 None 表示分类失败，移除该记录，等待中的调用方将自行分类。
+        """
+        if future is None:
+            return
+        if result is None:
+            with self._lock:
+                if self._entries.get(fingerprint) is future:
+                    self._remove(fingerprint)
+        future.set_result(result)
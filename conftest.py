@@ -0,0 +1 @@
+# 让 tests/ 下的用例可以直接 import backend.*
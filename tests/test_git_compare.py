@@ -0,0 +1,66 @@
+import os
+import subprocess
+
+import pytest
+
+from backend.modules.git_compare import compare_commits_by_diff, iter_commits
+
+GIT_ENV = {
+    **os.environ,
+    "GIT_AUTHOR_NAME": "Zhang | San",
+    "GIT_AUTHOR_EMAIL": "zs@example.com",
+    "GIT_COMMITTER_NAME": "Zhang | San",
+    "GIT_COMMITTER_EMAIL": "zs@example.com",
+}
+
+
+def git(repo, *args):
+    return subprocess.run(["git", *args], cwd=repo, env=GIT_ENV, check=True,
+                          capture_output=True, text=True).stdout.strip()
+
+
+@pytest.fixture
+def repo(tmp_path):
+    """
+    master: c0 <- c1 <- ... <- c5；target 从 c3 拉出并 cherry-pick 了 c4
+    """
+    git(tmp_path, "init", "-q", "-b", "master")
+    for i in range(6):
+        (tmp_path / f"f{i}.txt").write_text(f"{i}\n")
+        git(tmp_path, "add", ".")
+        git(tmp_path, "commit", "-q", "-m", f"feat | change {i}")
+    git(tmp_path, "checkout", "-q", "-b", "target", "master~2")
+    git(tmp_path, "cherry-pick", "master~1")
+    git(tmp_path, "checkout", "-q", "master")
+    return str(tmp_path)
+
+
+def test_iter_commits_parses_fields_with_separators(repo):
+    commits = list(iter_commits(repo, "master", "master~4", True))
+    assert [c["message"] for c in commits] == [f"feat | change {i}" for i in (5, 4, 3, 2, 1)]
+    assert all(c["author"] == "Zhang | San" for c in commits)
+    assert all(len(c["date"]) == len("2025-01-01 00:00:00") for c in commits)
+
+
+def test_iter_commits_skip_and_limit(repo):
+    page = list(iter_commits(repo, "master", "master~4", True, skip=2, limit=2))
+    assert [c["message"] for c in page] == ["feat | change 3", "feat | change 2"]
+
+
+def test_iter_commits_single_commit_has_one_page(repo):
+    assert len(list(iter_commits(repo, "master", "master~1", False))) == 1
+    assert list(iter_commits(repo, "master", "master~1", False, skip=1, limit=1)) == []
+
+
+def test_compare_commits_pages_and_has_more(repo):
+    matched, unmatched, checked, has_more = compare_commits_by_diff(repo, "master", "target", "master~4", True, 1, 2)
+    assert checked == 2 and has_more
+    assert [c["message"] for c in unmatched] == ["feat | change 5"]
+    assert [c["message"] for c in matched] == ["feat | change 4"]
+
+    matched, unmatched, checked, has_more = compare_commits_by_diff(repo, "master", "target", "master~4", True, 3, 2)
+    assert checked == 1 and not has_more
+    assert [c["message"] for c in matched] == ["feat | change 1"]
+
+    _, _, checked, has_more = compare_commits_by_diff(repo, "master", "target", "master~4", True)
+    assert checked == 5 and not has_more
@@ -0,0 +1,68 @@
+import json
+
+from backend.modules import local_classifier
+from backend.modules.local_classifier import LocalClassifier, load_training_samples, record_assignment
+
+MODULE_OWNERS = {
+    "入职管理": "liguann",
+    "调动管理": "madhui",
+    "转正管理": "madhui",
+    "报表系统": "majwr",
+    "其他": "hedwf",
+}
+
+
+def _samples():
+    texts, labels = [], []
+    for i in range(20):
+        texts.append(f"入职管理候选人offer发送失败{i}")
+        labels.append("入职管理")
+        texts.append(f"报表系统导出统计字段缺失{i}")
+        labels.append("报表系统")
+    return texts, labels
+
+
+def test_fit_is_confident_and_round_trips(tmp_path):
+    model = LocalClassifier().fit(*_samples())
+    module, probability = model.predict("候选人offer发送失败")
+    assert module == "入职管理"
+    assert probability >= 0.85
+
+    path = tmp_path / "model.npz"
+    model.save(path)
+    loaded = LocalClassifier.load(path)
+    assert loaded.classes == model.classes
+    assert loaded.predict_batch(["报表导出字段缺失"]) == model.predict_batch(["报表导出字段缺失"])
+
+
+def test_record_assignment_only_keeps_ai_or_changed_rows(tmp_path, monkeypatch):
+    path = tmp_path / "samples.jsonl"
+    monkeypatch.setattr(local_classifier, "LOCAL_CLASSIFIER_TRAINING_PATH", str(path))
+
+    rows = [
+        ({"description": "ai", "module": "入职管理", "source": "ai", "inherited": False}, "liguann"),
+        ({"description": "local", "module": "入职管理", "source": "local", "inherited": False}, "liguann"),
+        ({"description": "failed", "module": "其他", "source": "ai_failed", "inherited": False}, "hedwf"),
+        ({"description": "inherited", "module": "入职管理", "source": "ai", "inherited": True}, "liguann"),
+        ({"description": "changed", "module": "其他", "source": "ai_failed", "inherited": False}, "majwr"),
+    ]
+    for item, assignee in rows:
+        record_assignment(item, assignee, MODULE_OWNERS)
+
+    recorded = [json.loads(line)["description"] for line in path.read_text(encoding="utf-8").splitlines()]
+    assert recorded == ["ai", "changed"]
+
+
+def test_load_training_samples_drops_ambiguous_reassignment(tmp_path):
+    path = tmp_path / "samples.jsonl"
+    records = [
+        {"description": "a", "module": "其他", "assignee": "majwr", "source": "assign"},
+        {"description": "b", "module": "其他", "assignee": "madhui", "source": "assign"},
+        {"description": "c", "module": "入职管理", "assignee": "liguann", "source": "analyze"},
+        {"description": "c", "module": "报表系统", "assignee": "majwr", "source": "assign"},
+        {"description": "c", "module": "入职管理", "assignee": "liguann", "source": "analyze"},
+    ]
+    path.write_text("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records), encoding="utf-8")
+
+    texts, labels = load_training_samples(str(path), MODULE_OWNERS)
+    assert dict(zip(texts, labels)) == {"a": "报表系统", "c": "报表系统"}
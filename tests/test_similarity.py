@@ -0,0 +1,60 @@
+from backend.modules.similarity import SimHashIndex, hamming_distance, normalize_text, simhash
+
+TEMPLATE = "员工信息管理页面，租户 {tenant} 在 2025-07-01 保存员工档案时报错：空指针异常，无法提交{suffix}"
+OTHER = "入职管理中候选人offer发送失败，提示邮件服务器连接超时，请尽快处理"
+
+
+def test_normalize_strips_digits_and_punctuation():
+    assert normalize_text("租户 123，报错!") == "租户报错"
+
+
+def test_near_duplicates_are_within_distance():
+    a = simhash(normalize_text(TEMPLATE.format(tenant=1, suffix="")))
+    b = simhash(normalize_text(TEMPLATE.format(tenant=2, suffix="！")))
+    c = simhash(normalize_text(OTHER))
+    assert hamming_distance(a, b) <= 3
+    assert hamming_distance(a, c) > 3
+
+
+def test_lookup_reuses_resolved_result():
+    index = SimHashIndex(max_distance=3)
+    fingerprint, future, is_owner = index.lookup_or_reserve(TEMPLATE.format(tenant=1, suffix=""))
+    assert is_owner
+
+    # 分类中：近似描述拿到同一个 Future，等待复用
+    _, pending, is_owner = index.lookup_or_reserve(TEMPLATE.format(tenant=2, suffix=""))
+    assert not is_owner and pending is future
+
+    index.resolve(fingerprint, future, {"module": "员工信息管理"})
+    assert pending.result() == {"module": "员工信息管理"}
+
+    _, _, is_owner = index.lookup_or_reserve(OTHER)
+    assert is_owner
+
+
+def test_failed_resolution_is_not_reused():
+    index = SimHashIndex(max_distance=3)
+    fingerprint, future, _ = index.lookup_or_reserve(TEMPLATE.format(tenant=1, suffix=""))
+    _, waiting, is_owner = index.lookup_or_reserve(TEMPLATE.format(tenant=2, suffix=""))
+    assert not is_owner
+
+    index.resolve(fingerprint, future, None)
+    # 等待方收到 None 后自行分类；后续近似描述重新成为 owner
+    assert waiting.result() is None
+    _, _, is_owner = index.lookup_or_reserve(TEMPLATE.format(tenant=3, suffix=""))
+    assert is_owner
+
+
+def test_short_descriptions_bypass_index():
+    index = SimHashIndex()
+    assert index.lookup_or_reserve("登录报错 123") == (None, None, True)
+
+
+def test_oldest_entries_are_evicted():
+    index = SimHashIndex(max_distance=3, max_entries=1)
+    fingerprint, future, _ = index.lookup_or_reserve(TEMPLATE.format(tenant=1, suffix=""))
+    index.resolve(fingerprint, future, {"module": "员工信息管理"})
+    index.lookup_or_reserve(OTHER)
+
+    _, _, is_owner = index.lookup_or_reserve(TEMPLATE.format(tenant=2, suffix=""))
+    assert is_owner